@@ -4,6 +4,7 @@ VAC LITE - Simplified MCA (Multi-Candidate Assessment)
 This is a LITE implementation of MCA for demonstration.
 - Basic keyword matching (no NER, no date parsing)
 - Simple coverage scoring
+- Optional synonyms: a query keyword is covered by itself or any synonym
 """
 
 from collections import Counter
@@ -18,19 +19,21 @@ def simple_tokenize(text):
     return set(words)
 
 
-def mca_lite_filter(query, memories, max_k=50):
+def mca_lite_filter(query, memories, max_k=50, synonyms=None):
     """
     LITE MCA: Simple keyword coverage matching
 
     How it works:
     1. Extract keywords from query
-    2. Score each memory by overlap
+    2. Score each memory by overlap (a keyword counts once, whether it
+       matched directly or through one of its synonyms)
     3. Return top-K memories
 
     Args:
         query: User question
         memories: List of memory dictionaries with 'content' key
         max_k: Maximum number to return
+        synonyms: Optional {keyword: [synonyms]} from query expansion
 
     Returns:
         List of memory indices, sorted by coverage score
@@ -42,6 +45,12 @@ def mca_lite_filter(query, memories, max_k=50):
         # No keywords, return first max_k
         return list(range(min(max_k, len(memories))))
 
+    # Each keyword → alternatives (token sets, so multi-word synonyms need all words)
+    alternatives = {kw: [{kw}] for kw in query_keywords}
+    for kw, syns in (synonyms or {}).items():
+        if kw in alternatives:
+            alternatives[kw] += [simple_tokenize(s) for s in syns if simple_tokenize(s)]
+
     scores = []
 
     for idx, memory in enumerate(memories):
@@ -49,7 +58,10 @@ def mca_lite_filter(query, memories, max_k=50):
         memory_keywords = simple_tokenize(content)
 
         # Calculate keyword overlap
-        overlap = len(query_keywords & memory_keywords)
+        overlap = sum(
+            1 for alts in alternatives.values()
+            if any(alt <= memory_keywords for alt in alts)
+        )
         coverage = overlap / len(query_keywords) if query_keywords else 0
 
         scores.append({
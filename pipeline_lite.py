@@ -2,13 +2,13 @@
 VAC LITE - Simplified Pipeline
 
 Simplified version of VAC pipeline for demonstration:
+- Query expansion (optional, LLM synonyms with persistent cache)
 - MCA filter (basic keyword matching)
 - FAISS semantic search
 - Top-K selection
 - LLM answer generation
 
 Full pipeline has:
-+ Synonym expansion
 + BM25 lexical search
 + Union strategy
 + Cross-encoder reranking
@@ -24,7 +24,8 @@ from .mca_lite import mca_lite_filter
 class VACLitePipeline:
     """Simplified VAC pipeline for demonstration"""
 
-    def __init__(self, db_path, faiss_index_path, faiss_idmap_path, embedding_model=None):
+    def __init__(self, db_path, faiss_index_path, faiss_idmap_path, embedding_model=None,
+                 query_expander=None):
         """
         Initialize LITE pipeline
 
@@ -33,11 +34,14 @@ class VACLitePipeline:
             faiss_index_path: Path to FAISS index
             faiss_idmap_path: Path to FAISS ID mapping
             embedding_model: Embedding model (optional)
+            query_expander: Object with expand(query) -> {term: [synonyms]},
+                e.g. QueryExpander from query_expansion_lite (optional)
         """
         self.db_path = db_path
         self.faiss_index_path = faiss_index_path
         self.faiss_idmap_path = faiss_idmap_path
         self.embedding_model = embedding_model
+        self.query_expander = query_expander
 
         # Load FAISS index
         self.index = None
@@ -89,9 +93,10 @@ class VACLitePipeline:
 
         Steps:
         1. Get all memories
-        2. Apply MCA filter (keyword coverage) → top-50
-        3. Search FAISS on filtered results → top-15
-        4. Return top-15 memories
+        2. Expand query terms with synonyms (if query_expander is set)
+        3. Apply MCA filter (keyword coverage, synonyms count for their term) → top-50
+        4. Search FAISS on filtered results → top-15
+        5. Return top-15 memories
 
         Note: Full version also uses BM25, union, cross-encoder reranking
 
@@ -111,12 +116,20 @@ class VACLitePipeline:
         if not all_memories:
             return []
 
-        # Step 2: MCA filter (basic keyword matching)
-        mca_indices = mca_lite_filter(query, all_memories, max_k=mca_top_k)
+        # Step 2: Query expansion (cached, so repeated questions/terms cost no LLM call)
+        synonyms = None
+        if self.query_expander:
+            try:
+                synonyms = self.query_expander.expand(query)
+            except Exception as e:
+                print(f"⚠️  Query expansion failed: {e}")
+
+        # Step 3: MCA filter (basic keyword matching)
+        mca_indices = mca_lite_filter(query, all_memories, max_k=mca_top_k, synonyms=synonyms)
         mca_memories = [all_memories[idx] for idx in mca_indices]
         print(f"📍 After MCA filter: {len(mca_memories)} memories")
 
-        # Step 3: FAISS search on filtered results
+        # Step 4: FAISS search on filtered results
         if self.embedding_model and self.index is not None:
             try:
                 # Encode query
@@ -188,7 +201,8 @@ Answer:"""
 
 
 def process_questions_lite(db_path, faiss_index_path, faiss_idmap_path,
-                          questions_list, embedding_model=None, llm_model=None):
+                          questions_list, embedding_model=None, llm_model=None,
+                          query_expander=None):
     """
     Process questions using LITE pipeline
 
@@ -199,12 +213,22 @@ def process_questions_lite(db_path, faiss_index_path, faiss_idmap_path,
         questions_list: List of questions
         embedding_model: Embedding model
         llm_model: LLM model
+        query_expander: QueryExpander (optional); all questions are expanded
+            up front in batched LLM calls
 
     Returns:
         Results dictionary
     """
 
-    pipeline = VACLitePipeline(db_path, faiss_index_path, faiss_idmap_path, embedding_model)
+    pipeline = VACLitePipeline(db_path, faiss_index_path, faiss_idmap_path, embedding_model,
+                               query_expander)
+
+    if query_expander:
+        # Warm the cache once for the whole set instead of one LLM call per question
+        try:
+            query_expander.expand_batch([q['question'] for q in questions_list if q.get('question')])
+        except Exception as e:
+            print(f"⚠️  Query expansion warm-up failed: {e}")
 
     results = {
         'questions_processed': 0,
@@ -237,6 +261,7 @@ if __name__ == "__main__":
     =====================
 
     LITE Features:
+    - Cached LLM query expansion (optional)
     - Simple keyword-based MCA
     - FAISS semantic search
     - Basic LLM generation
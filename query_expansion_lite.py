@@ -0,0 +1,432 @@
+"""
+VAC LITE - Query Expansion (LLM synonym expansion)
+
+LITE implementation of the synonym expansion stage that runs before MCA:
+- Pluggable expander (Ollama-compatible /api/generate endpoint by default)
+- Many terms per LLM request (batched expansion calls)
+- Persistent SQLite cache for per-term and per-query expansions,
+  fronted by an in-memory LRU
+- Precompute mode to warm the cache for a whole locomo10.json question set
+
+Usage:
+    python query_expansion_lite.py data/locomo10.json [--cache data/expansion_cache.db] [--url URL]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+
+import requests
+
+
+OLLAMA_URL = os.getenv('OLLAMA_URL', os.getenv('OLLAMA_BASE_URL', 'http://localhost:11434'))
+EXPANSION_MODEL = os.getenv('EXPANSION_MODEL', 'qwen2.5:14b')
+DEFAULT_CACHE_PATH = 'data/expansion_cache.db'
+
+# Question words and fillers that never need synonyms
+STOPWORDS = {
+    'a', 'about', 'after', 'all', 'also', 'an', 'and', 'any', 'are', 'as', 'at',
+    'be', 'been', 'before', 'but', 'by', 'can', 'could', 'did', 'do', 'does',
+    'for', 'from', 'had', 'has', 'have', 'he', 'her', 'hers', 'him', 'his',
+    'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'kind', 'last', 'me',
+    'might', 'my', 'of', 'on', 'or', 'other', 'our', 'she', 'should', 'so',
+    'some', 'than', 'that', 'the', 'their', 'them', 'then', 'there', 'these',
+    'they', 'this', 'those', 'to', 'was', 'we', 'were', 'what', 'when', 'where',
+    'which', 'who', 'whom', 'whose', 'why', 'will', 'with', 'would', 'you', 'your',
+}
+
+EXPANSION_PROMPT = """For each term in the JSON array below, give up to {max_synonyms} short synonyms or closely related words that could appear in a casual conversation about the same thing.
+
+Terms: {terms}
+
+Return JSON only: an object whose keys are the terms exactly as they appear in the array, each mapped to a list of synonyms, e.g. {{"painting": ["art", "canvas"]}}.
+"""
+
+
+def expansion_terms(query):
+    """Extract expandable terms from a query (lowercase, no stopwords/numbers)"""
+    words = re.findall(r'\b\w+\b', query.lower())
+    terms = []
+    for w in words:
+        if len(w) < 3 or w in STOPWORDS or w.isdigit() or w in terms:
+            continue
+        terms.append(w)
+    return terms
+
+
+class ExpansionCache:
+    """
+    Persistent SQLite store for term/query expansions with an in-memory LRU
+
+    Every entry is keyed by (term or query, model key), so switching model,
+    synonym count or prompt never serves expansions produced by another setup.
+    """
+
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, lru_size=4096):
+        """
+        Args:
+            db_path: Path to SQLite cache file (":memory:" for a throwaway cache)
+            lru_size: Max entries kept in memory per table
+        """
+        self.db_path = db_path
+        self.lru_size = lru_size
+        self._lru = {'term': OrderedDict(), 'query': OrderedDict()}
+
+        cache_dir = os.path.dirname(db_path)
+        if cache_dir and db_path != ':memory:':
+            os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS term_synonyms "
+            "(term TEXT, model TEXT, synonyms TEXT, PRIMARY KEY (term, model))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS query_synonyms "
+            "(query TEXT, model TEXT, synonyms TEXT, PRIMARY KEY (query, model))"
+        )
+        self.conn.commit()
+
+    def _lru_get(self, kind, key):
+        lru = self._lru[kind]
+        if key in lru:
+            lru.move_to_end(key)
+            return lru[key]
+        return None
+
+    def _lru_put(self, kind, key, value):
+        lru = self._lru[kind]
+        lru[key] = value
+        lru.move_to_end(key)
+        while len(lru) > self.lru_size:
+            lru.popitem(last=False)
+
+    def get_terms(self, terms, model=''):
+        """Return {term: synonyms} for every term cached under model"""
+        found = {}
+        missing = []
+        for t in terms:
+            value = self._lru_get('term', (model, t))
+            if value is None:
+                missing.append(t)
+            else:
+                found[t] = value
+
+        # SQLite limits bound parameters per statement; stay well below it
+        for i in range(0, len(missing), 500):
+            chunk = missing[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT term, synonyms FROM term_synonyms WHERE model = ? AND term IN ({placeholders})",
+                [model] + chunk
+            ).fetchall()
+            for term, synonyms in rows:
+                value = json.loads(synonyms)
+                self._lru_put('term', (model, term), value)
+                found[term] = value
+        return found
+
+    def put_terms(self, expansions, model=''):
+        """Store {term: synonyms} under model"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO term_synonyms (term, model, synonyms) VALUES (?, ?, ?)",
+            [(t, model, json.dumps(s, ensure_ascii=False)) for t, s in expansions.items()]
+        )
+        self.conn.commit()
+        for t, s in expansions.items():
+            self._lru_put('term', (model, t), s)
+
+    def get_query(self, query, model=''):
+        """Return {term: synonyms} cached for query under model, or None"""
+        value = self._lru_get('query', (model, query))
+        if value is not None:
+            return value
+        row = self.conn.execute(
+            "SELECT synonyms FROM query_synonyms WHERE query = ? AND model = ?", (query, model)
+        ).fetchone()
+        if row:
+            value = json.loads(row[0])
+            self._lru_put('query', (model, query), value)
+            return value
+        return None
+
+    def count_queries(self, model=''):
+        """Number of queries cached under model"""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM query_synonyms WHERE model = ?", (model,)
+        ).fetchone()[0]
+
+    def put_queries(self, expansions, model=''):
+        """Store {query: {term: synonyms}} under model"""
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO query_synonyms (query, model, synonyms) VALUES (?, ?, ?)",
+            [(q, model, json.dumps(e, ensure_ascii=False)) for q, e in expansions.items()]
+        )
+        self.conn.commit()
+        for q, e in expansions.items():
+            self._lru_put('query', (model, q), e)
+
+    def close(self):
+        self.conn.close()
+
+
+class OllamaExpander:
+    """Synonym expander backed by an Ollama-compatible /api/generate endpoint"""
+
+    def __init__(self, base_url=OLLAMA_URL, model=EXPANSION_MODEL,
+                 batch_size=64, max_synonyms=3, timeout=120, retries=3):
+        """
+        Args:
+            base_url: Ollama server URL (a local stub server works too)
+            model: Model name sent with every request
+            batch_size: Max terms per LLM request
+            max_synonyms: Max synonyms kept per term
+            timeout: HTTP timeout in seconds
+            retries: Attempts per request before giving up
+        """
+        self.base_url = base_url.rstrip('/')
+        self.model = model
+        self.batch_size = batch_size
+        self.max_synonyms = max_synonyms
+        self.timeout = timeout
+        self.retries = retries
+
+    @property
+    def cache_key(self):
+        """Cache namespace: model + synonym count + prompt version"""
+        prompt_hash = hashlib.sha1(EXPANSION_PROMPT.encode('utf-8')).hexdigest()[:8]
+        return f"{self.model}|syn={self.max_synonyms}|prompt={prompt_hash}"
+
+    def _generate(self, prompt):
+        """POST one prompt, return raw response text (retry/backoff)"""
+        last_err = None
+        for attempt in range(self.retries):
+            try:
+                response = requests.post(
+                    f"{self.base_url}/api/generate",
+                    json={
+                        "model": self.model,
+                        "prompt": prompt,
+                        "format": "json",
+                        "stream": False,
+                        "options": {"temperature": 0.0},
+                    },
+                    timeout=self.timeout
+                )
+                if response.status_code == 200:
+                    return response.json().get("response", "")
+                last_err = RuntimeError(f"Ollama API error: {response.status_code}, {response.text}")
+            except Exception as e:
+                last_err = e
+            if attempt + 1 < self.retries:
+                time.sleep(attempt + 1)
+        raise last_err if last_err else RuntimeError("Expansion call failed")
+
+    def expand_terms(self, terms):
+        """
+        Expand terms in batches of batch_size (one LLM call per batch)
+
+        Stops at the first failed batch (transport error or a reply that is
+        not a JSON object) so a dead or misbehaving endpoint costs one
+        request, not one per batch.
+
+        Returns:
+            {term: [synonyms]} only for terms the LLM answered; failed or
+            omitted terms are absent so the caller does not cache them
+        """
+        result = {}
+        for i in range(0, len(terms), self.batch_size):
+            batch = terms[i:i + self.batch_size]
+            prompt = EXPANSION_PROMPT.format(
+                max_synonyms=self.max_synonyms,
+                terms=json.dumps(batch, ensure_ascii=False)
+            )
+            try:
+                data = json.loads(self._generate(prompt))
+                if not isinstance(data, dict):
+                    raise ValueError(f"expected a JSON object, got {type(data).__name__}")
+            except Exception as e:
+                print(f"⚠️  Expansion batch failed: {e}")
+                break
+
+            for term in batch:
+                synonyms = data.get(term)
+                if not isinstance(synonyms, list):
+                    continue
+                cleaned = []
+                for s in synonyms:
+                    s = str(s).strip().lower()
+                    if s and s != term and s not in cleaned:
+                        cleaned.append(s)
+                result[term] = cleaned[:self.max_synonyms]
+        return result
+
+
+class QueryExpander:
+    """
+    Query expansion stage: query → {term: [synonyms]} for its terms
+
+    Synonyms stay grouped under their term so MCA can count them as
+    alternatives for that term rather than as extra keywords.
+
+    Any object with expand_terms(list[str]) -> {term: [synonyms]} can be used
+    as the expander. Terms it fails to expand are not cached; they are
+    skipped for retry_after seconds (negative cache), and an empty reply
+    pauses all LLM calls for the same period, so a down endpoint does not
+    cost a blocking call per question.
+    """
+
+    def __init__(self, expander=None, cache=None, retry_after=300):
+        """
+        Args:
+            expander: Term expander (default: OllamaExpander())
+            cache: ExpansionCache (default: in-memory only)
+            retry_after: Seconds before failed terms / a down endpoint are retried
+        """
+        self.expander = expander or OllamaExpander()
+        self.cache = cache or ExpansionCache(':memory:')
+        self.retry_after = retry_after
+        self.model = getattr(self.expander, 'cache_key', getattr(self.expander, 'model', ''))
+        self._failed_until = {}
+        self._down_until = 0.0
+
+    def expand(self, query):
+        """Return {term: [synonyms]} for a single query"""
+        return self.expand_batch([query])[query]
+
+    def _fetch_terms(self, terms):
+        """Call the expander for terms not in the negative cache"""
+        now = time.time()
+        if now < self._down_until:
+            return {}
+        terms = [t for t in terms if self._failed_until.get(t, 0.0) <= now]
+        if not terms:
+            return {}
+
+        try:
+            fresh = self.expander.expand_terms(terms)
+        except Exception as e:
+            print(f"⚠️  Query expansion failed: {e}")
+            fresh = {}
+
+        until = time.time() + self.retry_after
+        if not fresh:
+            self._down_until = until
+        for t in terms:
+            if t in fresh:
+                self._failed_until.pop(t, None)
+            else:
+                self._failed_until[t] = until
+        if fresh:
+            self.cache.put_terms(fresh, self.model)
+        return fresh
+
+    def expand_batch(self, queries):
+        """
+        Expand many queries with as few LLM calls as possible
+
+        Steps:
+        1. Serve queries from the query cache
+        2. Collect terms of the remaining queries, serve them from the term cache
+        3. Expand all still-missing terms in batched LLM calls
+        4. Cache per-query synonym maps whose terms were all expanded
+
+        Returns:
+            {query: {term: [synonyms]}} (terms that failed to expand are absent)
+        """
+        result = {}
+        pending = []
+        for q in dict.fromkeys(queries):
+            cached = self.cache.get_query(q, self.model)
+            if cached is not None:
+                result[q] = cached
+            else:
+                pending.append(q)
+
+        if not pending:
+            return result
+
+        query_terms = {q: expansion_terms(q) for q in pending}
+        all_terms = list(dict.fromkeys(t for terms in query_terms.values() for t in terms))
+        synonyms = self.cache.get_terms(all_terms, self.model)
+
+        missing = [t for t in all_terms if t not in synonyms]
+        if missing:
+            synonyms.update(self._fetch_terms(missing))
+
+        complete = {}
+        for q in pending:
+            result[q] = {t: synonyms[t] for t in query_terms[q] if t in synonyms}
+            # Only cache queries whose terms were all expanded
+            if all(t in synonyms for t in query_terms[q]):
+                complete[q] = result[q]
+
+        if complete:
+            self.cache.put_queries(complete, self.model)
+        return result
+
+
+def load_locomo_questions(locomo_path):
+    """Load all QA questions from a locomo10.json file"""
+    with open(locomo_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    questions = []
+    for sample in data:
+        for qa in sample.get('qa', []):
+            q = qa.get('question')
+            if q:
+                questions.append(q)
+    return questions
+
+
+def precompute_expansions(locomo_path, query_expander):
+    """
+    Warm the expansion cache for an entire locomo10.json question set
+
+    Returns:
+        {'questions': unique questions, 'cached': questions fully expanded
+        and stored, 'missing': questions left incomplete}
+    """
+    questions = list(dict.fromkeys(load_locomo_questions(locomo_path)))
+    query_expander.expand_batch(questions)
+    cache, model = query_expander.cache, query_expander.model
+    cached = sum(1 for q in questions if cache.get_query(q, model) is not None)
+    return {
+        'questions': len(questions),
+        'cached': cached,
+        'missing': len(questions) - cached,
+    }
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Warm the query expansion cache for a LoCoMo question set")
+    parser.add_argument('locomo_path', help="Path to locomo10.json")
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help="SQLite cache file")
+    parser.add_argument('--url', default=OLLAMA_URL, help="Ollama-compatible server URL")
+    parser.add_argument('--model', default=EXPANSION_MODEL, help="Expansion model name")
+    parser.add_argument('--batch-size', type=int, default=64, help="Terms per LLM request")
+    args = parser.parse_args(argv[1:])
+
+    cache = ExpansionCache(args.cache)
+    expander = QueryExpander(OllamaExpander(args.url, args.model, batch_size=args.batch_size), cache)
+    start = time.time()
+    stats = precompute_expansions(args.locomo_path, expander)
+    total_cached = cache.count_queries(expander.model)
+    cache.close()
+    elapsed = time.time() - start
+
+    if stats['missing']:
+        print(f"⚠️  Expansions missing for {stats['missing']}/{stats['questions']} questions "
+              f"({elapsed:.1f}s, {total_cached} queries cached in {args.cache}); rerun to retry")
+        return 1
+    print(f"✅ Precomputed expansions for {stats['questions']} questions in {elapsed:.1f}s → {args.cache}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv))
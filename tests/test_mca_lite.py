@@ -0,0 +1,24 @@
+from mca_lite import mca_lite_filter
+
+
+MEMORIES = [
+    {'content': 'Art class: canvas and drawing supplies were on sale'},
+    {'content': 'Caroline would paint the sunrise at the lake'},
+    {'content': 'Melanie went camping'},
+]
+
+
+def test_synonyms_count_as_alternatives_for_their_term():
+    query = "When did Caroline paint a sunrise?"
+    synonyms = {'paint': ['art', 'canvas', 'drawing'], 'sunrise': ['dawn']}
+
+    assert mca_lite_filter(query, MEMORIES, max_k=1) == [1]
+    assert mca_lite_filter(query, MEMORIES, max_k=1, synonyms=synonyms) == [1]
+
+
+def test_synonym_covers_missing_term():
+    memories = [{'content': 'Caroline went hiking'}, {'content': 'Caroline loves her art class'}]
+    synonyms = {'paint': ['art class']}
+
+    assert mca_lite_filter("Caroline paint", memories, max_k=1) == [0]
+    assert mca_lite_filter("Caroline paint", memories, max_k=1, synonyms=synonyms) == [1]
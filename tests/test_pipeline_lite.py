@@ -0,0 +1,112 @@
+"""VACLitePipeline with a fake query expander"""
+
+import importlib
+import sqlite3
+import sys
+import types
+
+import pytest
+
+from conftest import ROOT
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('faiss')
+
+
+@pytest.fixture(scope='module')
+def pipeline_lite():
+    # pipeline_lite uses package-relative imports; expose the repo root as a package
+    package = types.ModuleType('vac_lite')
+    package.__path__ = [ROOT]
+    sys.modules.setdefault('vac_lite', package)
+    return importlib.import_module('vac_lite.pipeline_lite')
+
+
+class FakeExpander:
+    def __init__(self, fail_batch=False):
+        self.fail_batch = fail_batch
+        self.expand_calls = []
+        self.batch_calls = []
+
+    def expand(self, query):
+        self.expand_calls.append(query)
+        return {'paint': ['art']}
+
+    def expand_batch(self, queries):
+        self.batch_calls.append(list(queries))
+        if self.fail_batch:
+            raise sqlite3.OperationalError("database is locked")
+        return {q: {'paint': ['art']} for q in queries}
+
+
+class FakeEmbedding:
+    def __init__(self):
+        self.queries = []
+
+    def encode(self, text):
+        self.queries.append(text)
+        return [0.0, 0.0]
+
+
+class FakeIndex:
+    def search(self, vec, k):
+        return np.zeros((1, k), dtype='float32'), np.arange(k).reshape(1, k)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'memory.db')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE memories (id INTEGER PRIMARY KEY, content TEXT)")
+    conn.executemany("INSERT INTO memories (id, content) VALUES (?, ?)", [
+        (1, 'Caroline went hiking'),
+        (2, 'Caroline loves her art class'),
+    ])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_retrieve_passes_synonyms_to_mca_and_original_query_to_faiss(pipeline_lite, db_path, monkeypatch):
+    mca_calls = []
+    real_filter = pipeline_lite.mca_lite_filter
+
+    def recording_filter(query, memories, max_k=50, synonyms=None):
+        mca_calls.append((query, synonyms))
+        return real_filter(query, memories, max_k=max_k, synonyms=synonyms)
+
+    monkeypatch.setattr(pipeline_lite, 'mca_lite_filter', recording_filter)
+    embedding, expander = FakeEmbedding(), FakeExpander()
+    pipeline = pipeline_lite.VACLitePipeline(db_path, 'missing.faiss', 'missing.npy', embedding, expander)
+    pipeline.index, pipeline.idmap = FakeIndex(), np.array([2, 1])
+
+    results = pipeline.retrieve("Did Caroline paint?", faiss_top_k=2)
+
+    assert expander.expand_calls == ["Did Caroline paint?"]
+    assert mca_calls == [("Did Caroline paint?", {'paint': ['art']})]
+    assert embedding.queries == ["Did Caroline paint?"]
+    assert [r['id'] for r in results] == [2, 1]
+
+
+def test_process_questions_warms_expander_once(pipeline_lite, db_path):
+    expander = FakeExpander()
+    questions = [{'question': 'Did Caroline paint?'}, {'answer': 'no question'}, {'question': ''}]
+
+    results = pipeline_lite.process_questions_lite(
+        db_path, 'missing.faiss', 'missing.npy', questions, query_expander=expander
+    )
+
+    assert expander.batch_calls == [['Did Caroline paint?']]
+    assert results['questions_processed'] == 3
+
+
+def test_process_questions_survives_warm_up_failure(pipeline_lite, db_path, capsys):
+    expander = FakeExpander(fail_batch=True)
+
+    results = pipeline_lite.process_questions_lite(
+        db_path, 'missing.faiss', 'missing.npy', [{'question': 'Did Caroline paint?'}],
+        query_expander=expander
+    )
+
+    assert results['questions_processed'] == 1
+    assert "Query expansion warm-up failed" in capsys.readouterr().out
@@ -0,0 +1,224 @@
+"""Query expansion stage against a local stub Ollama server"""
+
+import json
+import math
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+import query_expansion_lite
+from query_expansion_lite import (
+    ExpansionCache,
+    OllamaExpander,
+    QueryExpander,
+    expansion_terms,
+    load_locomo_questions,
+    main,
+    precompute_expansions,
+)
+
+
+class StubOllama:
+    """Minimal /api/generate stub: answers '<term>_syn' for every term it is asked about"""
+
+    def __init__(self):
+        self.requests = []
+        self.omit = set()
+        self.status = 200
+        self.reply = None
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                terms = json.loads(re.search(r'Terms: (\[.*\])', body['prompt']).group(1))
+                stub.requests.append({'path': self.path, 'model': body['model'], 'terms': terms})
+                if stub.status != 200:
+                    payload = b'{"error": "down"}'
+                else:
+                    reply = stub.reply
+                    if reply is None:
+                        reply = {t: [f"{t}_syn"] for t in terms if t not in stub.omit}
+                    payload = json.dumps({'response': json.dumps(reply)}).encode()
+                self.send_response(stub.status)
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+
+class FakeClock:
+    """Stand-in for the time module: manual clock, no real sleeping"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def stub():
+    s = StubOllama()
+    yield s
+    s.server.shutdown()
+    s.server.server_close()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = FakeClock()
+    monkeypatch.setattr(query_expansion_lite, 'time', c)
+    return c
+
+
+def make_expander(stub, cache, retry_after=300, **kwargs):
+    kwargs.setdefault('retries', 1)
+    return QueryExpander(OllamaExpander(stub.url, model='stub', **kwargs), cache, retry_after)
+
+
+def write_locomo(tmp_path, questions):
+    path = tmp_path / 'locomo10.json'
+    half = len(questions) // 2
+    data = [
+        {'sample_id': 'conv-a', 'qa': [{'question': q, 'answer': ''} for q in questions[:half]]},
+        {'sample_id': 'conv-b', 'qa': [{'question': q, 'answer': ''} for q in questions[half:]]
+         + [{'answer': 'no question'}]},
+    ]
+    path.write_text(json.dumps(data), encoding='utf-8')
+    return str(path)
+
+
+QUESTIONS = [
+    "When did Caroline paint a sunrise?",
+    "What hobby does Melanie share with Caroline?",
+    "Where did Melanie go camping with her family?",
+]
+
+
+def test_batches_terms_per_request(stub):
+    terms = set(t for q in QUESTIONS for t in expansion_terms(q))
+    expander = make_expander(stub, ExpansionCache(':memory:'), batch_size=4)
+
+    result = expander.expand_batch(QUESTIONS)
+
+    assert len(stub.requests) == math.ceil(len(terms) / 4)
+    assert all(r['path'] == '/api/generate' for r in stub.requests)
+    assert result[QUESTIONS[0]] == {
+        'caroline': ['caroline_syn'], 'paint': ['paint_syn'], 'sunrise': ['sunrise_syn'],
+    }
+
+
+def test_persistent_cache_hit_after_reopen(stub, tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    question = QUESTIONS[0]
+
+    cache = ExpansionCache(db_path)
+    expected = make_expander(stub, cache).expand(question)
+    cache.close()
+    sent = len(stub.requests)
+
+    cache = ExpansionCache(db_path)
+    assert make_expander(stub, cache).expand(question) == expected
+    assert make_expander(stub, cache).expand("Caroline sunrise") == {
+        'caroline': ['caroline_syn'], 'sunrise': ['sunrise_syn'],
+    }
+    assert len(stub.requests) == sent
+
+    # Another synonym count is another cache namespace
+    make_expander(stub, cache, max_synonyms=5).expand(question)
+    assert len(stub.requests) == sent + 1
+    cache.close()
+
+
+def test_failed_terms_not_cached_until_retry(stub, clock):
+    stub.omit = {'sunrise'}
+    cache = ExpansionCache(':memory:')
+    expander = make_expander(stub, cache, retry_after=60)
+
+    assert expander.expand("Caroline sunrise") == {'caroline': ['caroline_syn']}
+    assert cache.get_terms(['caroline', 'sunrise'], expander.model) == {'caroline': ['caroline_syn']}
+    assert cache.get_query("Caroline sunrise", expander.model) is None
+
+    # Negative cache: no repeated call for the failed term before retry_after
+    clock.now += 30
+    expander.expand("Caroline sunrise")
+    assert len(stub.requests) == 1
+
+    stub.omit = set()
+    clock.now += 31
+    assert expander.expand("Caroline sunrise") == {
+        'caroline': ['caroline_syn'], 'sunrise': ['sunrise_syn'],
+    }
+    assert stub.requests[-1]['terms'] == ['sunrise']
+
+
+def test_down_endpoint_costs_one_call(stub):
+    stub.status = 500
+    expander = make_expander(stub, ExpansionCache(':memory:'), batch_size=1)
+
+    for _ in range(3):
+        assert expander.expand("Caroline paint sunrise") == {}
+    assert expander.expand("Melanie camping") == {}
+    assert len(stub.requests) == 1
+
+
+def test_non_object_reply_stops_batches(stub, capsys):
+    stub.reply = ["caroline", "sunrise"]
+    expander = make_expander(stub, ExpansionCache(':memory:'), batch_size=1)
+
+    assert expander.expand("Caroline paint sunrise") == {}
+    assert len(stub.requests) == 1
+    assert "Expansion batch failed" in capsys.readouterr().out
+
+
+def test_precompute_warms_cache(stub, tmp_path):
+    locomo_path = write_locomo(tmp_path, QUESTIONS + [QUESTIONS[0]])
+    assert load_locomo_questions(locomo_path) == QUESTIONS + [QUESTIONS[0]]
+
+    cache = ExpansionCache(str(tmp_path / 'cache.db'))
+    expander = make_expander(stub, cache)
+
+    stats = precompute_expansions(locomo_path, expander)
+
+    assert stats == {'questions': 3, 'cached': 3, 'missing': 0}
+    for q in QUESTIONS:
+        assert cache.get_query(q, expander.model) == {t: [f"{t}_syn"] for t in expansion_terms(q)}
+    sent = len(stub.requests)
+    expander.expand_batch(QUESTIONS)
+    assert len(stub.requests) == sent
+
+
+def test_precompute_cli_reports_missing_expansions(stub, tmp_path, clock):
+    locomo_path = write_locomo(tmp_path, QUESTIONS)
+    db_path = str(tmp_path / 'cache.db')
+    argv = ['query_expansion_lite.py', locomo_path, '--cache', db_path, '--url', stub.url, '--model', 'stub']
+
+    stub.status = 500
+    assert main(argv) == 1
+    cache = ExpansionCache(db_path)
+    assert cache.conn.execute("SELECT COUNT(*) FROM term_synonyms").fetchone()[0] == 0
+    assert cache.conn.execute("SELECT COUNT(*) FROM query_synonyms").fetchone()[0] == 0
+    cache.close()
+
+    stub.status = 200
+    stub.omit = {'camping'}
+    assert main(argv) == 1
+
+    stub.omit = set()
+    assert main(argv) == 0
+    cache = ExpansionCache(db_path)
+    assert cache.conn.execute("SELECT COUNT(*) FROM query_synonyms").fetchone()[0] == len(QUESTIONS)
+    cache.close()